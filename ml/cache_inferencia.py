@@ -0,0 +1,124 @@
+"""
+Cache persistente de resultados de inferência de pose.
+
+Os resultados são endereçados pelo conteúdo: a chave é o hash do vídeo, dos
+pesos do modelo e dos parâmetros de inferência. Cada chave guarda os arrays de
+keypoints em segmentos de `segment_frames` frames (um arquivo .npz por
+segmento), de modo que intervalos que se sobrepõem parcialmente reaproveitam
+os segmentos já calculados. O tamanho total em disco é limitado a `max_bytes`,
+descartando primeiro os segmentos usados há mais tempo (LRU).
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+# Arrays que todo segmento salvo precisa ter
+CAMPOS = ('keypoints', 'boxes', 'frames')
+
+# Hashes já calculados nesta execução: (caminho, tamanho, mtime) -> sha256
+_hashes = {}
+
+
+def hash_arquivo(path, chunk_size=1 << 20):
+    """Retorna o sha256 do conteúdo de um arquivo (memorizado por tamanho e mtime)."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    memo = (str(path), stat.st_size, stat.st_mtime_ns)
+    if memo not in _hashes:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha.update(chunk)
+        _hashes[memo] = sha.hexdigest()
+    return _hashes[memo]
+
+
+class CacheInferencia:
+    """
+    Cache em disco de keypoints por segmento, com descarte LRU.
+
+    Estrutura: `<cache_dir>/<chave>/<segmento>.npz`. O mtime de cada arquivo
+    marca o último acesso e é usado para o descarte.
+    """
+
+    def __init__(self, cache_dir='runs/cache', max_bytes=2 * 1024 ** 3, segment_frames=300):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.segment_frames = segment_frames
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def chave(self, video_path, model_path, params):
+        """Chave do cache para um vídeo, um modelo e os parâmetros de inferência."""
+        conteudo = {
+            'video': hash_arquivo(video_path),
+            'model': hash_arquivo(model_path),
+            'params': params,
+            'segment_frames': self.segment_frames,
+        }
+        texto = json.dumps(conteudo, sort_keys=True, default=str)
+        return hashlib.sha256(texto.encode()).hexdigest()[:32]
+
+    def _arquivo(self, chave, segmento):
+        return self.cache_dir / chave / f'{segmento:06d}.npz'
+
+    def carregar(self, chave, segmento):
+        """
+        Retorna os arrays de um segmento ou None se ele não está no cache.
+
+        Um arquivo danificado (truncado, vazio ou sem os arrays de `CAMPOS`)
+        conta como ausente e é removido para ser recalculado.
+        """
+        arquivo = self._arquivo(chave, segmento)
+        try:
+            with np.load(arquivo) as dados:
+                arrays = {nome: dados[nome] for nome in dados.files}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            arrays = None
+        if arrays is None or any(campo not in arrays for campo in CAMPOS):
+            try:
+                arquivo.unlink(missing_ok=True)
+            except OSError:
+                pass  # Cache somente leitura: apenas ignora o segmento
+            return None
+        try:
+            os.utime(arquivo)  # Marca o acesso para o LRU
+        except OSError:
+            pass  # Cache somente leitura: o acerto continua valendo
+        return arrays
+
+    def salvar(self, chave, segmento, **arrays):
+        """Grava os arrays de um segmento e aplica o limite de disco."""
+        arquivo = self._arquivo(chave, segmento)
+        arquivo.parent.mkdir(parents=True, exist_ok=True)
+        # Escrita atômica: um segmento pela metade nunca fica visível
+        tmp = arquivo.with_name(arquivo.stem + '.tmp.npz')
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, arquivo)
+        self.descartar()
+
+    def descartar(self):
+        """Remove os segmentos menos usados até o cache caber em `max_bytes`."""
+        arquivos = []
+        for arquivo in self.cache_dir.glob('*/*.npz'):
+            try:
+                stat = arquivo.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((stat.st_mtime, stat.st_size, arquivo))
+
+        total = sum(size for _, size, _ in arquivos)
+        for _, size, arquivo in sorted(arquivos):
+            if total <= self.max_bytes:
+                break
+            arquivo.unlink(missing_ok=True)
+            total -= size
+            # Remove a pasta da chave quando ela fica vazia
+            if not any(arquivo.parent.iterdir()):
+                arquivo.parent.rmdir()
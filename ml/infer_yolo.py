@@ -1,8 +1,130 @@
+import ultralytics
 from ultralytics import YOLO
+from ultralytics.engine.results import Results
 import cv2
+import math
+import time
+import numpy as np
+import torch
+
+# Parâmetros de inferência no frame inteiro
+INFER_ARGS = dict(imgsz=640, conf=0.5, iou=0.5)
+
+# Parâmetros padrão da cascata (também fazem parte da chave do cache)
+CASCATA_ARGS = dict(detect_every=15, crop_imgsz=320, pad=1.4, min_conf=0.6)
+
+
+def _melhor_caixa(result):
+    """Retorna a caixa (xyxy) de maior confiança e sua confiança, ou (None, 0.0)."""
+    if result.boxes is None or len(result.boxes) == 0:
+        return None, 0.0
+    i = int(result.boxes.conf.argmax())
+    return result.boxes.xyxy[i].tolist(), float(result.boxes.conf[i])
+
+
+def _recortar_roi(box, width, height, pad, min_size):
+    """Expande a caixa em torno do centro (quadrada, fator `pad`) e a mantém dentro do frame."""
+    x1, y1, x2, y2 = box
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    lado = max(x2 - x1, y2 - y1, min_size / pad) * pad
+    lado = int(min(lado, width, height))
+    # Perto da borda a janela é deslocada para dentro, não cortada, e continua quadrada
+    x0 = int(min(max(0, cx - lado / 2), width - lado))
+    y0 = int(min(max(0, cy - lado / 2), height - lado))
+    return x0, y0, x0 + lado, y0 + lado
+
+
+def _mapear_para_frame(result, frame, x0, y0):
+    """Converte um resultado obtido no recorte para coordenadas do frame inteiro."""
+    boxes = result.boxes.data.clone()
+    boxes[:, [0, 2]] += x0
+    boxes[:, [1, 3]] += y0
+
+    keypoints = result.keypoints.data.clone()
+    # Keypoints não detectados vêm como (0, 0) e devem continuar assim
+    detectados = (keypoints[..., 0] > 0) | (keypoints[..., 1] > 0)
+    keypoints[..., 0] += x0 * detectados
+    keypoints[..., 1] += y0 * detectados
+
+    return Results(frame, path=result.path, names=result.names, boxes=boxes, keypoints=keypoints)
+
+
+def _melhor_pessoa(result, kpt_shape):
+    """Keypoints (K, 3) e caixa (x1, y1, x2, y2, conf) da detecção de maior confiança; NaN se não houver."""
+    keypoints = np.full(kpt_shape, np.nan, dtype=np.float32)
+    box = np.full(5, np.nan, dtype=np.float32)
+    if result.boxes is not None and len(result.boxes) > 0:
+        i = int(result.boxes.conf.argmax())
+        box = result.boxes.data[i, :5].cpu().numpy().astype(np.float32)
+        keypoints = result.keypoints.data[i].cpu().numpy().astype(np.float32)
+    return keypoints, box
+
+
+def _resultado_salvo(frame, keypoints, box, names):
+    """Reconstrói um Results a partir dos arrays salvos, para desenhar no frame."""
+    if np.isnan(box).any():
+        boxes = torch.zeros((0, 6))
+        keypoints = torch.zeros((0, *keypoints.shape))
+    else:
+        boxes = torch.as_tensor(np.append(box, 0.0)[None])  # classe 0
+        keypoints = torch.as_tensor(keypoints[None])
+    return Results(frame, path='', names=names, boxes=boxes, keypoints=keypoints)
+
+
+class CascataROI:
+    """
+    Inferência em cascata: detecta o bebê no frame inteiro de tempos em tempos e,
+    nos frames seguintes, roda a pose apenas em um recorte ampliado da última
+    caixa, com `imgsz` menor. Volta ao frame inteiro quando a confiança cai.
+    """
+
+    def __init__(self, model, detect_every=CASCATA_ARGS['detect_every'],
+                 crop_imgsz=CASCATA_ARGS['crop_imgsz'], pad=CASCATA_ARGS['pad'],
+                 min_conf=CASCATA_ARGS['min_conf'], infer_args=INFER_ARGS):
+        self.model = model
+        self.detect_every = detect_every    # redetecção no frame inteiro a cada N frames
+        self.crop_imgsz = crop_imgsz        # imgsz usado no recorte
+        self.pad = pad                      # fator de ampliação da caixa
+        self.min_conf = min_conf            # abaixo disso, fallback para o frame inteiro
+        self.infer_args = infer_args
+        self.box = None
+        self.frames_desde_deteccao = 0
+        self.chamadas_frame = 0
+        self.chamadas_recorte = 0
+
+    def __call__(self, frame):
+        height, width = frame.shape[:2]
+
+        if self.box is not None and self.frames_desde_deteccao < self.detect_every:
+            x0, y0, x1, y1 = _recortar_roi(self.box, width, height, self.pad, self.crop_imgsz)
+            args = dict(self.infer_args, imgsz=self.crop_imgsz)
+            result = self.model(frame[y0:y1, x0:x1], verbose=False, **args)[0]
+            self.chamadas_recorte += 1
+
+            box, conf = _melhor_caixa(result)
+            if box is not None and conf >= self.min_conf:
+                self.box = [box[0] + x0, box[1] + y0, box[2] + x0, box[3] + y0]
+                self.frames_desde_deteccao += 1
+                return _mapear_para_frame(result, frame, x0, y0)
+
+        # Frame inteiro: primeira detecção, redetecção periódica ou fallback
+        result = self.model(frame, verbose=False, **self.infer_args)[0]
+        self.chamadas_frame += 1
+        box, conf = _melhor_caixa(result)
+        self.box = box if conf >= self.min_conf else None
+        self.frames_desde_deteccao = 0
+        return result
+
 
 # Função principal para realizar inferência em um vídeo
-def inferencia_video(model_path, video_input, output_video):
+def inferencia_video(model_path, video_input, output_video, cascata=False, cache=None):
+    """
+    Gera o vídeo anotado. Com `cache`, o vídeo é processado em segmentos de
+    `cache.segment_frames` frames: segmentos já presentes são desenhados a partir
+    dos arrays salvos, que guardam só a detecção de maior confiança (top-1), e os
+    ausentes são inferidos durante a renderização e gravados ao terminar. Nesse
+    modo a cascata é reiniciada a cada segmento, com ou sem acerto no cache.
+    """
     # Carregar o modelo YOLOv8
     model = YOLO(model_path)
     
@@ -23,6 +145,18 @@ def inferencia_video(model_path, video_input, output_video):
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(output_video, fourcc, fps, (width, height))
     
+    # Modo cascata: pose em recortes ao redor do bebê
+    cascade = CascataROI(model) if cascata else None
+    
+    # Com cache, os keypoints vêm do disco e só os segmentos ausentes são calculados
+    if cache is not None:
+        chave = cache.chave(video_input, model_path, _params_cache(cascata))
+        seg = cache.segment_frames
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        kpt_shape = tuple(model.model.yaml['kpt_shape'])
+    salvos = novos = None
+    n_frame = 0
+    
     # Processar cada frame do vídeo
     while True:
         ret, frame = cap.read()
@@ -30,8 +164,33 @@ def inferencia_video(model_path, video_input, output_video):
         if not ret:
             break  # Sai do loop quando o vídeo acabar
         
+        # Início de um segmento do cache: carrega do disco ou prepara para gravar
+        if cache is not None:
+            segmento, pos = divmod(n_frame, seg)
+            if pos == 0:
+                salvos = cache.carregar(chave, segmento)
+                novos = {'keypoints': [], 'boxes': [], 'frames': []}
+                if cascata:
+                    cascade = CascataROI(model)
+        
         # Realizar inferência no frame
-        results = model(frame, imgsz=640, conf=0.5, iou=0.5)
+        if salvos is not None and pos < len(salvos['frames']) and salvos['frames'][pos] == n_frame:
+            results = [_resultado_salvo(frame, salvos['keypoints'][pos],
+                                        salvos['boxes'][pos], model.names)]
+        else:
+            if cascade is not None:
+                results = [cascade(frame)]
+            else:
+                results = model(frame, **INFER_ARGS)
+            if cache is not None:
+                kp, box = _melhor_pessoa(results[0], kpt_shape)
+                novos['keypoints'].append(kp)
+                novos['boxes'].append(box)
+                novos['frames'].append(n_frame)
+                # Segmento completo: entra no cache
+                if len(novos['frames']) == min(seg, total - segmento * seg):
+                    cache.salvar(chave, segmento, **_arrays_segmento(novos, kpt_shape))
+        n_frame += 1
         
         # Extrair o resultado como uma imagem com anotações
         annotated_frame = results[0].plot()
@@ -50,6 +209,198 @@ def inferencia_video(model_path, video_input, output_video):
     cap.release()
     out.release()
     cv2.destroyAllWindows()
+    
+    # Com cache a cascata é recriada a cada segmento e os contadores não cobrem o vídeo todo
+    if cascade is not None and cache is None:
+        print(f"Cascata: {cascade.chamadas_frame} inferências no frame inteiro, "
+              f"{cascade.chamadas_recorte} no recorte")
+
+
+def _params_cache(cascata):
+    """Parâmetros que entram na chave do cache (mudá-los invalida os segmentos salvos)."""
+    return dict(INFER_ARGS, cascata=CASCATA_ARGS if cascata else None,
+                ultralytics=ultralytics.__version__)
+
+
+def _arrays_segmento(listas, kpt_shape):
+    """Converte as listas acumuladas de um segmento nos arrays gravados no cache."""
+    return {
+        'keypoints': np.array(listas['keypoints'], dtype=np.float32).reshape(-1, *kpt_shape),
+        'boxes': np.array(listas['boxes'], dtype=np.float32).reshape(-1, 5),
+        'frames': np.array(listas['frames'], dtype=np.int64),
+    }
+
+
+def _inferir_segmento(model, cap, inicio, n_frames, cascata):
+    """
+    Roda a pose em até `n_frames` frames a partir de `inicio` e retorna os arrays
+    da melhor pessoa junto com o índice absoluto de cada frame.
+    """
+    kpt_shape = tuple(model.model.yaml['kpt_shape'])
+    # Só faz seek se a captura ainda não estiver no frame pedido
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != inicio:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, inicio)
+    posicao = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if posicao != inicio:
+        print(f"Aviso: seek para o frame {inicio} parou no frame {posicao}.")
+    # A cascata é reiniciada em cada segmento para que ele não dependa dos anteriores
+    cascade = CascataROI(model) if cascata else None
+
+    listas = {'keypoints': [], 'boxes': [], 'frames': []}
+    for i in range(n_frames):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if cascade is not None:
+            result = cascade(frame)
+        else:
+            result = model(frame, verbose=False, **INFER_ARGS)[0]
+        kp, box = _melhor_pessoa(result, kpt_shape)
+        listas['keypoints'].append(kp)
+        listas['boxes'].append(box)
+        listas['frames'].append(posicao + i)
+
+    return _arrays_segmento(listas, kpt_shape)
+
+
+# Extrai keypoints de um intervalo do vídeo (em segundos), usando o cache se fornecido
+def extrair_keypoints(model_path, video_input, inicio=0.0, fim=None, cascata=False, cache=None, model=None):
+    cap = cv2.VideoCapture(video_input)
+    if not cap.isOpened():
+        print("Erro ao abrir o vídeo.")
+        return None
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    f0 = int(round(inicio * fps))
+    f1 = total if fim is None else min(total, int(round(fim * fps)))
+
+    # O modelo (se não foi passado) só é carregado se algum segmento precisar ser calculado
+    partes = []
+    if cache is None:
+        if model is None:
+            model = YOLO(model_path)
+        partes.append(_inferir_segmento(model, cap, f0, f1 - f0, cascata))
+    else:
+        chave = cache.chave(video_input, model_path, _params_cache(cascata))
+        seg = cache.segment_frames
+        for segmento in range(f0 // seg, math.ceil(f1 / seg)):
+            dados = cache.carregar(chave, segmento)
+            if dados is None:
+                if model is None:
+                    model = YOLO(model_path)
+                inicio_seg = segmento * seg
+                dados = _inferir_segmento(model, cap, inicio_seg, seg, cascata)
+                # Só entra no cache o segmento completo e alinhado ao frame esperado
+                esperado = min(seg, total - inicio_seg)
+                if len(dados['frames']) == esperado and (esperado == 0 or dados['frames'][0] == inicio_seg):
+                    cache.salvar(chave, segmento, **dados)
+                else:
+                    print(f"Aviso: segmento {segmento} com {len(dados['frames'])} frames "
+                          f"(esperado {esperado}); não foi salvo no cache.")
+            partes.append(dados)
+
+    cap.release()
+    partes = [p for p in partes if len(p['frames'])]
+    if not partes:
+        return None
+
+    # Cada frame é posicionado pelo seu índice absoluto; frames ausentes ficam inválidos
+    n = f1 - f0
+    keypoints = np.full((n, *partes[0]['keypoints'].shape[1:]), np.nan, dtype=np.float32)
+    boxes = np.full((n, 5), np.nan, dtype=np.float32)
+    valido = np.zeros(n, dtype=bool)
+    for parte in partes:
+        dentro = (parte['frames'] >= f0) & (parte['frames'] < f1)
+        idx = parte['frames'][dentro] - f0
+        keypoints[idx] = parte['keypoints'][dentro]
+        boxes[idx] = parte['boxes'][dentro]
+        valido[idx] = True
+
+    return {
+        'keypoints': keypoints,
+        'boxes': boxes,
+        'valido': valido,
+        'frames': np.arange(f0, f1),
+        'fps': fps,
+        'inicio_frame': f0,
+    }
+
+
+# Compara o modo cascata com o frame inteiro (velocidade e erro dos keypoints)
+def comparar_cascata(model_path, video_input, max_frames=300, **cascata_kwargs):
+    model = YOLO(model_path)
+    cascade = CascataROI(model, **cascata_kwargs)
+
+    cap = cv2.VideoCapture(video_input)
+    if not cap.isOpened():
+        print("Erro ao abrir o vídeo.")
+        return None
+
+    ret, frame = cap.read()
+    if not ret:
+        cap.release()
+        print("Nenhum frame lido.")
+        return None
+
+    # Aquecimento fora da medição: a primeira chamada inclui a criação do predictor.
+    # A cascata descartável é chamada duas vezes para passar também pelo recorte.
+    model(frame, verbose=False, **INFER_ARGS)
+    aquecimento = CascataROI(model, **cascata_kwargs)
+    aquecimento(frame)
+    aquecimento(frame)
+
+    tempo_frame = tempo_cascata = 0.0
+    erros = []
+    perdidos = 0
+    n_frames = 0
+    while n_frames < max_frames:
+        # O primeiro frame já foi lido para o aquecimento
+        if n_frames > 0:
+            ret, frame = cap.read()
+            if not ret:
+                break
+        n_frames += 1
+
+        inicio = time.perf_counter()
+        ref = model(frame, verbose=False, **INFER_ARGS)[0]
+        tempo_frame += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        res = cascade(frame)
+        tempo_cascata += time.perf_counter() - inicio
+
+        # Compara os keypoints do bebê de maior confiança em cada modo
+        if ref.boxes is None or len(ref.boxes) == 0:
+            continue
+        if res.boxes is None or len(res.boxes) == 0:
+            perdidos += 1
+            continue
+        kp_ref = ref.keypoints.data[int(ref.boxes.conf.argmax())]
+        kp_res = res.keypoints.data[int(res.boxes.conf.argmax())]
+        visiveis = (kp_ref[:, 2] > 0.5) & (kp_res[:, 2] > 0.5)
+        if visiveis.any():
+            dist = (kp_ref[visiveis, :2] - kp_res[visiveis, :2]).norm(dim=1)
+            erros.append(float(dist.mean()))
+
+    cap.release()
+
+    resumo = {
+        'frames': n_frames,
+        'fps_frame_inteiro': n_frames / tempo_frame,
+        'fps_cascata': n_frames / tempo_cascata,
+        'erro_medio_px': sum(erros) / len(erros) if erros else float('nan'),
+        'frames_perdidos': perdidos,
+        'chamadas_frame': cascade.chamadas_frame,
+        'chamadas_recorte': cascade.chamadas_recorte,
+    }
+    print("📊 Cascata vs frame inteiro:")
+    print(f" - FPS (frame inteiro): {resumo['fps_frame_inteiro']:.1f}")
+    print(f" - FPS (cascata):       {resumo['fps_cascata']:.1f}")
+    print(f" - Erro médio keypoints: {resumo['erro_medio_px']:.2f} px")
+    print(f" - Frames perdidos pela cascata: {perdidos}/{n_frames}")
+    return resumo
+
 
 # Parâmetros do script
 if __name__ == "__main__":
@@ -62,5 +413,11 @@ if __name__ == "__main__":
     # Caminho para o vídeo de saída com detecções
     output_video = "output_video2.mp4"
     
-    # Executar a inferência no vídeo
-    inferencia_video(model_path, video_input, output_video)
\ No newline at end of file
+    # True: só compara cascata x frame inteiro (FPS e erro dos keypoints), sem gerar vídeo
+    comparar = False
+    
+    if comparar:
+        comparar_cascata(model_path, video_input)
+    else:
+        # Executar a inferência no vídeo (cascata=True roda a pose só no recorte do bebê)
+        inferencia_video(model_path, video_input, output_video)
\ No newline at end of file
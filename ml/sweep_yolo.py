@@ -0,0 +1,377 @@
+"""
+Sweep de hiperparâmetros para o treinamento YOLO-pose (ASHA / successive halving).
+
+Cada configuração é treinada primeiro com poucas épocas, `imgsz` reduzido e um
+subconjunto do dataset. Ao final de cada degrau ("rung") a métrica é lida do
+`results.csv` gerado pelo Ultralytics; apenas o melhor 1/ETA das configurações
+que chegaram ao degrau é promovido para um orçamento ETA vezes maior. As
+sobreviventes do último degrau são treinadas com a configuração completa de
+`train_yolo.py`.
+
+A promoção é assíncrona (ASHA): um worker livre nunca espera o degrau inteiro
+terminar, o que mantém todos os processos de CPU ocupados.
+
+Aproximação por warm restart: a configuração promovida continua a partir do
+`last.pt` do degrau anterior, mas cada degrau é um novo `train()`, então o
+agendamento de `lr0`/`cos_lr` recomeça. As épocas de um degrau (3, 9, 27...)
+são o total acumulado de épocas treinadas, não um único schedule dessa duração.
+O ranking usa a métrica da última época, que corresponde ao `last.pt` usado
+na continuação.
+
+Uso (a partir da pasta ml/):
+    python sweep_yolo.py
+"""
+
+import csv
+import math
+import multiprocessing as mp
+import os
+import random
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import yaml
+
+from train_yolo import DATA_YAML, MODEL_WEIGHTS, TRAIN_ARGS
+
+# Coluna do results.csv usada para ranquear as configurações
+METRIC = 'metrics/mAP50-95(P)'
+
+# Espaço de busca: listas são amostradas uniformemente, tuplas ('log', a, b)
+# em escala logarítmica e ('uniform', a, b) em escala linear
+SEARCH_SPACE = {
+    'optimizer': ['AdamW', 'SGD'],
+    'lr0': ('log', 1e-4, 1e-2),
+    'weight_decay': ('log', 1e-5, 1e-3),
+    'cos_lr': [True, False],
+    'batch': [8, 16],
+    'scale': ('uniform', 0.2, 0.6),
+    'hsv_s': ('uniform', 0.3, 0.9),
+}
+
+RESULT_FIELDS = ['trial', 'stage', 'rung', 'epochs', 'imgsz', 'fraction',
+                 'metric', 'seconds', 'status', 'save_dir', 'params']
+
+
+def sample_config(space, rng):
+    """Amostra uma configuração do espaço de busca."""
+    config = {}
+    for key, spec in space.items():
+        if isinstance(spec, list):
+            config[key] = rng.choice(spec)
+        elif spec[0] == 'log':
+            config[key] = math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2])))
+        elif spec[0] == 'uniform':
+            config[key] = rng.uniform(spec[1], spec[2])
+        else:
+            raise ValueError(f"Distribuição desconhecida para '{key}': {spec[0]}")
+    return config
+
+
+def _resolve_split(data, yaml_dir, split):
+    """Resolve o diretório de imagens de um split do data.yaml."""
+    entry = data[split]
+    candidates = [Path(entry)]
+    if data.get('path'):
+        candidates.append(Path(data['path']) / entry)
+    candidates.append(yaml_dir / entry)
+    # Exports do Roboflow usam '../train/images' relativo à pasta do YAML
+    candidates.append(yaml_dir / entry.replace('../', '', 1))
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate.resolve()
+    raise FileNotFoundError(f"Split '{split}' não encontrado: {entry}")
+
+
+def make_subset(data_yaml, out_dir, fraction, seed=42):
+    """
+    Cria um data.yaml apontando para uma fração das imagens de treino e validação.
+
+    Cada split vira uma árvore própria `<split>/images` + `<split>/labels` de
+    symlinks, para que o `labels.cache` do subconjunto fique em `out_dir` e não
+    sobrescreva o do dataset completo.
+    """
+    data_yaml = Path(data_yaml)
+    with open(data_yaml) as f:
+        data = yaml.safe_load(f)
+
+    out_dir = Path(out_dir).resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    image_ext = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+    for split in ('train', 'val'):
+        split_dir = _resolve_split(data, data_yaml.parent, split)
+        labels_dir = split_dir.parent / 'labels'
+        images = sorted(p for p in split_dir.rglob('*') if p.suffix.lower() in image_ext)
+        k = max(1, round(len(images) * fraction))
+        subset = sorted(rng.sample(images, k))
+
+        # Recria a árvore do split (um sweep anterior pode ter usado outra fração)
+        subset_dir = out_dir / split
+        if subset_dir.exists():
+            shutil.rmtree(subset_dir)
+        for image in subset:
+            rel = image.relative_to(split_dir)
+            link = subset_dir / 'images' / rel
+            link.parent.mkdir(parents=True, exist_ok=True)
+            link.symlink_to(image)
+            # Imagens sem rótulo (fundo) continuam sem rótulo no subconjunto
+            label = (labels_dir / rel).with_suffix('.txt')
+            if label.exists():
+                label_link = subset_dir / 'labels' / rel.with_suffix('.txt')
+                label_link.parent.mkdir(parents=True, exist_ok=True)
+                label_link.symlink_to(label)
+        data[split] = str(subset_dir / 'images')
+
+    data['path'] = str(out_dir)
+    data.pop('test', None)
+    subset_yaml = out_dir / 'data.yaml'
+    with open(subset_yaml, 'w') as f:
+        yaml.safe_dump(data, f, sort_keys=False)
+    return subset_yaml
+
+
+def warm_label_cache(subset_yaml):
+    """
+    Gera o labels.cache do subconjunto uma única vez no processo principal.
+
+    Sem isso, os primeiros workers escreveriam o mesmo cache ao mesmo tempo.
+    """
+    from ultralytics.data.dataset import YOLODataset
+    from ultralytics.data.utils import check_det_dataset
+
+    data = check_det_dataset(str(subset_yaml))
+    for split in ('train', 'val'):
+        YOLODataset(img_path=data[split], data=data, task='pose', augment=False)
+
+
+def read_metric(save_dir, metric=METRIC):
+    """Retorna `metric` na última época do results.csv de um run (a do last.pt)."""
+    results_csv = Path(save_dir) / 'results.csv'
+    if not results_csv.exists():
+        return None
+    with open(results_csv, newline='') as f:
+        rows = [{k.strip(): v for k, v in row.items()} for row in csv.DictReader(f)]
+    values = [float(row[metric]) for row in rows if row.get(metric, '').strip()]
+    return values[-1] if values else None
+
+
+def _init_worker(n_threads):
+    """Limita os threads do torch/OpenMP para que os workers não disputem os núcleos."""
+    os.environ['OMP_NUM_THREADS'] = str(n_threads)
+    import torch
+    torch.set_num_threads(n_threads)
+
+
+def run_trial(job):
+    """
+    Treina uma configuração (executado dentro de um processo worker).
+
+    `job` é um dicionário com trial, rung, epochs, params, weights, data e
+    demais overrides; o retorno repete esses campos acrescidos da métrica.
+    """
+    from ultralytics import YOLO
+
+    args = dict(TRAIN_ARGS)
+    args.update(job['params'])
+    args.update(job['overrides'])
+    args.update(
+        data=str(job['data']),
+        epochs=job['epochs'],
+        project=str(job['project']),
+        name=job['name'],
+        verbose=False,
+    )
+
+    start = time.time()
+    result = dict(job, metric=None, status='ok', save_dir='', last=None)
+    try:
+        model = YOLO(job['weights'])
+        train_results = model.train(**args)
+        save_dir = Path(train_results.save_dir)
+        result['save_dir'] = str(save_dir)
+        result['metric'] = read_metric(save_dir)
+        last = save_dir / 'weights' / 'last.pt'
+        result['last'] = str(last) if last.exists() else None
+        if result['metric'] is None:
+            result['status'] = 'no-metric'
+    except Exception as e:
+        result['status'] = f'failed: {e}'
+    result['seconds'] = round(time.time() - start, 1)
+    return result
+
+
+class ASHAScheduler:
+    """
+    Escalonador assíncrono de successive halving.
+
+    Degrau k usa `min_epochs * eta**k` épocas no total. Uma configuração do
+    degrau k é promovida quando está entre o melhor 1/eta de todas as que já
+    terminaram esse degrau.
+    """
+
+    def __init__(self, n_trials, min_epochs=3, eta=3, n_rungs=3, seed=42):
+        self.n_trials = n_trials
+        self.min_epochs = min_epochs
+        self.eta = eta
+        self.n_rungs = n_rungs
+        self.rng = random.Random(seed)
+        self.trials = {}                                   # trial -> params
+        self.rungs = [dict() for _ in range(n_rungs)]      # trial -> (metric, last.pt)
+        self.promoted = [set() for _ in range(n_rungs)]
+
+    def rung_epochs(self, rung):
+        return self.min_epochs * self.eta ** rung
+
+    def next_job(self):
+        """Retorna (trial, rung, params, weights) ou None se não há trabalho agora."""
+        # Promoções têm prioridade, começando pelos degraus mais altos
+        for rung in reversed(range(self.n_rungs - 1)):
+            finished = [(t, m) for t, (m, _) in self.rungs[rung].items() if m is not None]
+            finished.sort(key=lambda item: item[1], reverse=True)
+            top = finished[:len(finished) // self.eta]
+            for trial, _ in top:
+                if trial not in self.promoted[rung]:
+                    self.promoted[rung].add(trial)
+                    weights = self.rungs[rung][trial][1]
+                    return trial, rung + 1, self.trials[trial], weights
+
+        if len(self.trials) < self.n_trials:
+            trial = len(self.trials)
+            self.trials[trial] = sample_config(SEARCH_SPACE, self.rng)
+            return trial, 0, self.trials[trial], None
+        return None
+
+    def report(self, trial, rung, metric, last):
+        self.rungs[rung][trial] = (metric, last)
+
+    def survivors(self, k):
+        """As k melhores configurações, priorizando o degrau mais alto alcançado."""
+        best = {}
+        for rung, results in enumerate(self.rungs):
+            for trial, (metric, _) in results.items():
+                if metric is not None:
+                    best[trial] = (rung, metric)
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        return [trial for trial, _ in ranked[:k]]
+
+
+def write_results(rows, path):
+    """Grava a tabela de resultados do sweep em CSV."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict(row, params=repr(row['params'])))
+
+
+def print_results(rows):
+    """Exibe os runs ordenados por estágio, degrau e métrica."""
+    ordered = sorted(rows, key=lambda r: (r['stage'] == 'full', r['rung'],
+                                          r['metric'] if r['metric'] is not None else -1),
+                     reverse=True)
+    print(f"{'trial':>5} {'stage':>6} {'rung':>4} {'ep':>4} {'imgsz':>5} {'metric':>8} {'tempo(s)':>9}  params")
+    for r in ordered:
+        metric = f"{r['metric']:.4f}" if r['metric'] is not None else '-'
+        params = ', '.join(f"{k}={v:.3g}" if isinstance(v, float) else f"{k}={v}"
+                           for k, v in r['params'].items())
+        print(f"{r['trial']:>5} {r['stage']:>6} {r['rung']:>4} {r['epochs']:>4} "
+              f"{r['imgsz']:>5} {metric:>8} {r['seconds']:>9}  {params}")
+        if r['status'] != 'ok':
+            print(f"{'':>5} ↳ {r['status']}")
+
+
+def run_sweep(data_yaml=DATA_YAML, sweep_dir='runs/sweep', n_trials=27, n_workers=4,
+              min_epochs=3, eta=3, n_rungs=3, sweep_imgsz=384, fraction=0.25,
+              n_final=2, final_device=TRAIN_ARGS['device'], seed=42):
+    """
+    Executa o sweep ASHA em processos de CPU e treina as sobreviventes completas.
+
+    Returns:
+        list[dict]: uma linha por run (estágios 'sweep' e 'full').
+    """
+    sweep_dir = Path(sweep_dir).resolve()
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+    subset_yaml = make_subset(data_yaml, sweep_dir / 'subset', fraction, seed)
+    warm_label_cache(subset_yaml)
+    results_path = sweep_dir / 'sweep_results.csv'
+
+    scheduler = ASHAScheduler(n_trials, min_epochs, eta, n_rungs, seed)
+    # Cada worker roda em CPU com um único thread de dataloader; os threads do
+    # torch são limitados em _init_worker para que os processos dividam os núcleos
+    overrides = dict(imgsz=sweep_imgsz, device='cpu', workers=0, amp=False,
+                     save_period=-1, plots=False, patience=0)
+    rows = []
+
+    def make_job(trial, rung, params, weights):
+        prev_epochs = scheduler.rung_epochs(rung - 1) if rung else 0
+        job_overrides = dict(overrides)
+        if weights:
+            # Continuação a partir do degrau anterior (warm restart): sem novo warmup
+            job_overrides['warmup_epochs'] = 0
+        return dict(trial=trial, rung=rung, stage='sweep',
+                    epochs=scheduler.rung_epochs(rung) - prev_epochs,
+                    imgsz=sweep_imgsz, fraction=fraction, params=params,
+                    weights=weights or MODEL_WEIGHTS, data=subset_yaml,
+                    overrides=job_overrides, project=sweep_dir / 'trials',
+                    name=f'trial{trial:03d}_r{rung}')
+
+    ctx = mp.get_context('spawn')
+    n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(n_threads,)) as pool:
+        pending = set()
+        while True:
+            while len(pending) < n_workers:
+                job = scheduler.next_job()
+                if job is None:
+                    break
+                pending.add(pool.submit(run_trial, make_job(*job)))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                # Épocas acumuladas (em warm restarts), para comparar degraus diferentes
+                result['epochs'] = scheduler.rung_epochs(result['rung'])
+                scheduler.report(result['trial'], result['rung'],
+                                 result['metric'], result['last'])
+                rows.append(result)
+                write_results(rows, results_path)
+                print(f"trial {result['trial']:03d} rung {result['rung']}: "
+                      f"{METRIC}={result['metric']} ({result['status']})")
+
+    # Sobreviventes recebem o treinamento completo de train_yolo.py
+    for trial in scheduler.survivors(n_final):
+        job = dict(trial=trial, rung=n_rungs, stage='full',
+                   epochs=TRAIN_ARGS['epochs'], imgsz=TRAIN_ARGS['imgsz'], fraction=1.0,
+                   params=scheduler.trials[trial], weights=MODEL_WEIGHTS, data=data_yaml,
+                   overrides=dict(device=final_device), project=sweep_dir / 'full',
+                   name=f'trial{trial:03d}')
+        rows.append(run_trial(job))
+        write_results(rows, results_path)
+
+    print_results(rows)
+    print(f"📂 Tabela de resultados: {results_path}")
+    return rows
+
+
+if __name__ == "__main__":
+    if not os.path.exists(DATA_YAML):
+        raise FileNotFoundError(f"Arquivo não encontrado: {DATA_YAML}")
+
+    run_sweep(
+        data_yaml=DATA_YAML,
+        sweep_dir='runs/sweep',
+        n_trials=27,          # configurações amostradas no degrau 0
+        n_workers=4,          # processos de CPU em paralelo
+        min_epochs=3,         # degraus com 3, 9 e 27 épocas
+        eta=3,                # promove o melhor 1/3 de cada degrau
+        n_rungs=3,
+        sweep_imgsz=384,      # imgsz reduzido durante o sweep
+        fraction=0.25,        # fração do dataset usada no sweep
+        n_final=2,            # sobreviventes treinadas com a configuração completa
+    )
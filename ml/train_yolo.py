@@ -1,17 +1,11 @@
-from ultralytics import YOLO
 import os
 
-# === 1. Carregar modelo ===
-model = YOLO('yolov8l-pose.pt')  # Troque por 'm', 'l', etc. conforme necessidade
+# === Configuração base do treinamento ===
+# Reutilizada também pelo sweep de hiperparâmetros (sweep_yolo.py)
+MODEL_WEIGHTS = 'yolov8l-pose.pt'  # Troque por 'm', 'l', etc. conforme necessidade
+DATA_YAML = '/mnt/hd2/datasets/proj-neonatal/yolo_dataset/neonatal_18key.v1i.yolov8/data.yaml'
 
-# === 2. Verificar dataset YAML ===
-data_yaml = '/mnt/hd2/datasets/proj-neonatal/yolo_dataset/neonatal_18key.v1i.yolov8/data.yaml'
-if not os.path.exists(data_yaml):
-    raise FileNotFoundError(f"Arquivo não encontrado: {data_yaml}")
-
-# === 3. Treinamento com pastas padrão ===
-results = model.train(
-    data=data_yaml,
+TRAIN_ARGS = dict(
     epochs=100,
     imgsz=768,
     batch=8,
@@ -47,15 +41,30 @@ results = model.train(
     seed=42
 )
 
-# === 4. Pós-treino ===
-print("✅ Treinamento concluído!")
-print(f"📂 Resultados salvos em: {results.save_dir}")
+
+if __name__ == "__main__":
+    # Importado aqui para que a configuração possa ser lida sem o ultralytics
+    from ultralytics import YOLO
+
+    # === 1. Carregar modelo ===
+    model = YOLO(MODEL_WEIGHTS)
+
+    # === 2. Verificar dataset YAML ===
+    if not os.path.exists(DATA_YAML):
+        raise FileNotFoundError(f"Arquivo não encontrado: {DATA_YAML}")
+
+    # === 3. Treinamento com pastas padrão ===
+    results = model.train(data=DATA_YAML, **TRAIN_ARGS)
+
+    # === 4. Pós-treino ===
+    print("✅ Treinamento concluído!")
+    print(f"📂 Resultados salvos em: {results.save_dir}")
 
 
-# 5. Validação final (opcional, mas útil)
-metrics = model.val()
-print("📊 Métricas de validação:")
-print(f" - mAP50-95 (caixa): {metrics.box.map:.4f}")
-print(f" - mAP50 (caixa):    {metrics.box.map50:.4f}")
-print(f" - mAP50-95 (pose):  {metrics.pose.map:.4f}")
-print(f" - mAP50 (pose):     {metrics.pose.map50:.4f}")
\ No newline at end of file
+    # 5. Validação final (opcional, mas útil)
+    metrics = model.val()
+    print("📊 Métricas de validação:")
+    print(f" - mAP50-95 (caixa): {metrics.box.map:.4f}")
+    print(f" - mAP50 (caixa):    {metrics.box.map50:.4f}")
+    print(f" - mAP50-95 (pose):  {metrics.pose.map:.4f}")
+    print(f" - mAP50 (pose):     {metrics.pose.map50:.4f}")
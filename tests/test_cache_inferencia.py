@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pytest
+
+from cache_inferencia import CacheInferencia
+
+
+def _segmento(n=10):
+    return {
+        'keypoints': np.zeros((n, 18, 3), dtype=np.float32),
+        'boxes': np.zeros((n, 5), dtype=np.float32),
+        'frames': np.arange(n),
+    }
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    video = tmp_path / 'video_low.mp4'
+    model = tmp_path / 'best.pt'
+    video.write_bytes(b'video' * 100)
+    model.write_bytes(b'pesos')
+    return video, model
+
+
+def test_chave_changes_with_params_and_segment_frames(tmp_path, arquivos):
+    video, model = arquivos
+    cache = CacheInferencia(tmp_path / 'cache', segment_frames=300)
+    base = cache.chave(video, model, {'imgsz': 640, 'conf': 0.5})
+
+    assert cache.chave(video, model, {'conf': 0.5, 'imgsz': 640}) == base
+    assert cache.chave(video, model, {'imgsz': 320, 'conf': 0.5}) != base
+    outro = CacheInferencia(tmp_path / 'cache', segment_frames=150)
+    assert outro.chave(video, model, {'imgsz': 640, 'conf': 0.5}) != base
+
+
+def test_carregar_roundtrip(tmp_path, arquivos):
+    cache = CacheInferencia(tmp_path / 'cache')
+    chave = cache.chave(*arquivos, {})
+    assert cache.carregar(chave, 0) is None
+
+    cache.salvar(chave, 0, **_segmento())
+    dados = cache.carregar(chave, 0)
+    assert dados['keypoints'].shape == (10, 18, 3)
+    np.testing.assert_array_equal(dados['frames'], np.arange(10))
+
+
+@pytest.mark.parametrize('conteudo', [b'', b'PK\x03\x04truncado'])
+def test_carregar_treats_damaged_file_as_miss(tmp_path, arquivos, conteudo):
+    cache = CacheInferencia(tmp_path / 'cache')
+    chave = cache.chave(*arquivos, {})
+    arquivo = cache._arquivo(chave, 0)
+    arquivo.parent.mkdir(parents=True)
+    arquivo.write_bytes(conteudo)
+
+    assert cache.carregar(chave, 0) is None
+    assert not arquivo.exists()
+
+
+def test_carregar_rejects_segment_without_frames(tmp_path, arquivos):
+    cache = CacheInferencia(tmp_path / 'cache')
+    chave = cache.chave(*arquivos, {})
+    dados = _segmento()
+    del dados['frames']
+    cache.salvar(chave, 0, **dados)
+
+    assert cache.carregar(chave, 0) is None
+    assert not cache._arquivo(chave, 0).exists()
+
+
+def test_descartar_removes_oldest_first_and_empty_key_dir(tmp_path, arquivos):
+    cache = CacheInferencia(tmp_path / 'cache', max_bytes=10 ** 9)
+    velha = cache.chave(*arquivos, {'imgsz': 640})
+    nova = cache.chave(*arquivos, {'imgsz': 320})
+    cache.salvar(velha, 0, **_segmento())
+    cache.salvar(nova, 0, **_segmento())
+    cache.salvar(nova, 1, **_segmento())
+
+    # Datas de acesso explícitas: o segmento da chave antiga é o menos usado
+    for i, arquivo in enumerate([cache._arquivo(velha, 0), cache._arquivo(nova, 0),
+                                 cache._arquivo(nova, 1)]):
+        os.utime(arquivo, (1000 + i, 1000 + i))
+    tamanho = cache._arquivo(nova, 0).stat().st_size
+
+    cache.max_bytes = 2 * tamanho + 1
+    cache.descartar()
+
+    assert not (tmp_path / 'cache' / velha).exists()
+    assert cache._arquivo(nova, 0).exists()
+    assert cache._arquivo(nova, 1).exists()
+
+    cache.max_bytes = tamanho + 1
+    cache.descartar()
+    assert not cache._arquivo(nova, 0).exists()
+    assert cache._arquivo(nova, 1).exists()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('ultralytics')
+torch = pytest.importorskip('torch')
+from ultralytics.engine.results import Results
+
+from infer_yolo import _mapear_para_frame, _recortar_roi
+
+
+@pytest.mark.parametrize('box', [
+    (0, 0, 50, 50),          # canto superior esquerdo
+    (600, 300, 640, 360),    # canto inferior direito
+    (200, 100, 300, 200),    # centro
+    (0, 0, 640, 360),        # caixa maior que a menor dimensão do frame
+])
+def test_recortar_roi_is_square_and_inside_frame(box):
+    x0, y0, x1, y1 = _recortar_roi(box, 640, 360, pad=1.4, min_size=320)
+    assert x1 - x0 == y1 - y0
+    assert 0 <= x0 < x1 <= 640
+    assert 0 <= y0 < y1 <= 360
+
+
+def test_recortar_roi_keeps_min_size_at_border():
+    x0, y0, x1, y1 = _recortar_roi((0, 0, 50, 50), 640, 360, pad=1.4, min_size=320)
+    assert (x0, y0) == (0, 0)
+    assert x1 - x0 >= 320
+
+
+def test_mapear_para_frame_shifts_detected_and_keeps_missing_keypoints():
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    crop = frame[50:370, 100:420]
+    boxes = torch.tensor([[10.0, 20.0, 110.0, 120.0, 0.9, 0.0]])
+    keypoints = torch.tensor([[[15.0, 25.0, 0.9], [0.0, 0.0, 0.1]]])
+    result = Results(crop, path='', names={0: 'bebe'}, boxes=boxes, keypoints=keypoints)
+
+    mapped = _mapear_para_frame(result, frame, 100, 50)
+
+    assert mapped.orig_shape == (360, 640)
+    assert mapped.boxes.xyxy[0].tolist() == [110.0, 70.0, 210.0, 170.0]
+    assert mapped.keypoints.data[0, 0].tolist() == pytest.approx([115.0, 75.0, 0.9])
+    assert mapped.keypoints.data[0, 1, :2].tolist() == [0.0, 0.0]
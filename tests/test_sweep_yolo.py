@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from sweep_yolo import ASHAScheduler, make_subset, read_metric
+
+RUNS_DIR = Path(__file__).resolve().parents[1] / 'ml' / 'runs' / 'pose' / 'train'
+
+
+def _drain(scheduler):
+    jobs = []
+    while (job := scheduler.next_job()) is not None:
+        jobs.append(job)
+    return jobs
+
+
+def test_asha_promotes_top_fraction_per_rung():
+    scheduler = ASHAScheduler(n_trials=27, min_epochs=3, eta=3, n_rungs=3)
+    assert [scheduler.rung_epochs(r) for r in range(3)] == [3, 9, 27]
+
+    # Degrau 0 inteiro termina antes de qualquer promoção
+    rung0 = _drain(scheduler)
+    assert len(rung0) == 27 and all(rung == 0 for _, rung, _, _ in rung0)
+    for trial, rung, _, _ in rung0:
+        scheduler.report(trial, rung, trial / 100, f'trial{trial}_r0.pt')
+
+    rung1 = _drain(scheduler)
+    assert sorted(t for t, _, _, _ in rung1) == list(range(18, 27))
+    assert all(rung == 1 for _, rung, _, _ in rung1)
+    # A continuação parte do checkpoint do degrau anterior
+    assert all(weights == f'trial{t}_r0.pt' for t, _, _, weights in rung1)
+    for trial, rung, _, _ in rung1:
+        scheduler.report(trial, rung, trial / 100, None)
+
+    rung2 = _drain(scheduler)
+    assert sorted(t for t, _, _, _ in rung2) == [24, 25, 26]
+    assert [len(r) for r in scheduler.rungs] == [27, 9, 0]
+
+
+def test_asha_survivors_rank_by_highest_rung_first():
+    scheduler = ASHAScheduler(n_trials=9, n_rungs=2)
+    scheduler.trials = {0: {}, 1: {}, 2: {}}
+    scheduler.report(0, 0, 0.9, None)   # melhor métrica, mas só no degrau 0
+    scheduler.report(1, 0, 0.5, None)
+    scheduler.report(1, 1, 0.4, None)
+    scheduler.report(2, 0, 0.3, None)
+    scheduler.report(2, 1, 0.6, None)
+
+    assert scheduler.survivors(2) == [2, 1]
+    assert scheduler.survivors(3) == [2, 1, 0]
+
+
+def test_read_metric_uses_last_epoch():
+    assert read_metric(RUNS_DIR) == pytest.approx(0.55187)
+    assert read_metric(RUNS_DIR / 'missing') is None
+
+
+def test_make_subset_builds_own_images_and_labels_tree(tmp_path):
+    dataset = tmp_path / 'dataset'
+    for split in ('train', 'valid'):
+        (dataset / split / 'images').mkdir(parents=True)
+        (dataset / split / 'labels').mkdir(parents=True)
+        for i in range(8):
+            (dataset / split / 'images' / f'{i}.jpg').write_bytes(b'')
+            (dataset / split / 'labels' / f'{i}.txt').write_text('0 0.5 0.5 0.1 0.1\n')
+    data_yaml = dataset / 'data.yaml'
+    data_yaml.write_text(yaml.safe_dump({
+        'train': '../train/images', 'val': '../valid/images',
+        'kpt_shape': [18, 3], 'names': ['bebe'],
+    }))
+
+    subset_yaml = make_subset(data_yaml, tmp_path / 'subset', fraction=0.5)
+    data = yaml.safe_load(subset_yaml.read_text())
+
+    for split in ('train', 'val'):
+        images = sorted(Path(data[split]).iterdir())
+        labels = sorted((Path(data[split]).parent / 'labels').iterdir())
+        assert len(images) == 4
+        assert [p.stem for p in labels] == [p.stem for p in images]
+        assert all(p.is_symlink() for p in images + labels)
+        assert Path(data[split]).is_relative_to(tmp_path / 'subset')